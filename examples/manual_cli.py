@@ -39,6 +39,7 @@ async def main():
     listener = keyboard.Listener(on_press=input_handler.on_press)
     listener.start()
     
+    message_handler = None
     try:
         # Connect to the API
         await client.connect()
@@ -75,11 +76,16 @@ async def main():
             elif command == 'enter' and data:
                 # Send text message
                 await client.send_text(data)
-
-            await asyncio.sleep(0.01) 
     except Exception as e:
         print(f"Error: {e}")
     finally:
+        # Stop the message handler so it doesn't outlive the connection
+        if message_handler:
+            message_handler.cancel()
+            try:
+                await message_handler
+            except asyncio.CancelledError:
+                pass
         # Clean up
         listener.stop()
         audio_handler.cleanup()
@@ -87,7 +93,7 @@ async def main():
 
 if __name__ == "__main__":
     # Install required packages:
-    # pip install pyaudio pynput pydub websockets
+    # pip install pyaudio pynput pydub websockets orjson
 
     print("Starting Realtime API CLI...")
     asyncio.run(main())
@@ -36,6 +36,7 @@ async def main():
     listener = keyboard.Listener(on_press=input_handler.on_press)
     listener.start()
     
+    message_handler = None
     try:
         await client.connect()
         message_handler = asyncio.create_task(client.handle_messages())
@@ -58,6 +59,13 @@ async def main():
     except Exception as e:
         print(f"Error: {e}")
     finally:
+        # Stop the message handler so it doesn't outlive the connection
+        if message_handler:
+            message_handler.cancel()
+            try:
+                await message_handler
+            except asyncio.CancelledError:
+                pass
         audio_handler.stop_streaming()
         audio_handler.cleanup()
         await client.close()
@@ -1,8 +1,9 @@
 import asyncio
 import websockets
-import json
-import base64
+import orjson
 import io
+import struct
+from binascii import a2b_base64, b2a_base64
 
 from typing import Optional, Callable, List, Dict, Any
 from enum import Enum
@@ -10,6 +11,53 @@ from pydub import AudioSegment
 
 from llama_index.core.tools import BaseTool, AsyncBaseTool, ToolSelection, adapt_to_async_tool, call_tool_with_selection
 
+# 200ms of 24kHz, mono, PCM16 audio per input_audio_buffer.append event
+AUDIO_SEND_CHUNK_BYTES = 24000 * 2 // 5
+
+# Pre-serialized events with a fixed shape, so hot paths skip building and dumping dicts.
+# Appends only need the base64 audio spliced between the prefix and suffix.
+_APPEND_PREFIX = '{"type":"input_audio_buffer.append","audio":"'
+_APPEND_SUFFIX = '"}'
+_COMMIT_EVENT = orjson.dumps({"type": "input_audio_buffer.commit"}).decode()
+_RESPONSE_CREATE_EVENT = orjson.dumps({
+    "type": "response.create",
+    "response": {
+        "modalities": ["text", "audio"]
+    }
+}).decode()
+_RESPONSE_CANCEL_EVENT = orjson.dumps({"type": "response.cancel"}).decode()
+
+
+def _extract_pcm16_24k_mono(buf: bytes) -> Optional[memoryview]:
+    """
+    Return the raw PCM payload of a WAV buffer if it is already 24kHz, mono, PCM16.
+
+    Returns None if the buffer is not a WAV file or is in any other format.
+    """
+    if len(buf) < 12 or buf[:4] != b'RIFF' or buf[8:12] != b'WAVE':
+        return None
+
+    offset = 12
+    fmt_ok = False
+    while offset + 8 <= len(buf):
+        chunk_id, chunk_size = struct.unpack_from('<4sI', buf, offset)
+        offset += 8
+        if chunk_id == b'fmt ':
+            if chunk_size < 16 or offset + 16 > len(buf):
+                return None
+            audio_format, channels, rate, _, _, bits = struct.unpack_from('<HHIIHH', buf, offset)
+            fmt_ok = (audio_format, channels, rate, bits) == (1, 1, 24000, 16)
+            if not fmt_ok:
+                return None
+        elif chunk_id == b'data':
+            if not fmt_ok:
+                return None
+            return memoryview(buf)[offset:offset + chunk_size]
+        # chunks are padded to an even number of bytes
+        offset += chunk_size + (chunk_size & 1)
+
+    return None
+
 
 class TurnDetectionMode(Enum):
     SERVER_VAD = "server_vad"
@@ -98,7 +146,8 @@ class RealtimeClient:
         # Track printing state for input and output transcripts
         self._print_input_transcript = False
         self._output_transcript_buffer = ""
-        
+        # Base64 audio deltas waiting to be decoded and handed to on_audio_delta
+        self._audio_decode_queue: Optional[asyncio.Queue] = None
         
 
         
@@ -111,7 +160,17 @@ class RealtimeClient:
             "OpenAI-Beta": "realtime=v1"
         }
         
-        self.ws = await websockets.connect(url, extra_headers=headers)
+        # Events are JSON carrying base64-encoded PCM, which doesn't compress well,
+        # so skip permessage-deflate. Audio events can also exceed the default 1 MiB limit.
+        self.ws = await websockets.connect(
+            url,
+            extra_headers=headers,
+            compression=None,
+            max_size=None,
+            ping_interval=20,
+            ping_timeout=20
+        )
+        self._audio_decode_queue = asyncio.Queue()
         
         # Set up default session configuration
         tools = [t.metadata.to_openai_tool()['function'] for t in self.tools]
@@ -156,13 +215,20 @@ class RealtimeClient:
         else:
             raise ValueError(f"Invalid turn detection mode: {self.turn_detection_mode}")
 
+    async def _send_event(self, event: Dict[str, Any]) -> None:
+        """Serialize and send an event that doesn't have a pre-serialized form."""
+        # orjson returns UTF-8 bytes, but the websockets version we pin always sends bytes as a binary frame
+        # and the Realtime API expects text frames, so this still has to go through str.
+        # Newer websockets releases accept `send(payload, text=True)`, which would skip the decode.
+        await self.ws.send(orjson.dumps(event).decode())
+
     async def update_session(self, config: Dict[str, Any]) -> None:
         """Update session configuration."""
         event = {
             "type": "session.update",
             "session": config
         }
-        await self.ws.send(json.dumps(event))
+        await self._send_event(event)
 
     async def send_text(self, text: str) -> None:
         """Send text message to the API."""
@@ -177,28 +243,27 @@ class RealtimeClient:
                 }]
             }
         }
-        await self.ws.send(json.dumps(event))
+        await self._send_event(event)
         await self.create_response()
 
     async def send_audio(self, audio_bytes: bytes) -> None:
         """Send audio data to the API."""
-        # Convert audio to required format (24kHz, mono, PCM16)
-        audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
-        audio = audio.set_frame_rate(24000).set_channels(1).set_sample_width(2)
-        pcm_data = base64.b64encode(audio.raw_data).decode()
-        
-        # Append audio to buffer
-        append_event = {
-            "type": "input_audio_buffer.append",
-            "audio": pcm_data
-        }
-        await self.ws.send(json.dumps(append_event))
+        # Skip the decode/convert round-trip if the audio is already 24kHz, mono, PCM16
+        pcm = _extract_pcm16_24k_mono(audio_bytes)
+        if pcm is None:
+            # Convert audio to required format (24kHz, mono, PCM16)
+            audio = AudioSegment.from_file(io.BytesIO(audio_bytes))
+            audio = audio.set_frame_rate(24000).set_channels(1).set_sample_width(2)
+            pcm = audio.raw_data
+
+        # Stream the audio in slices so the server can start processing early
+        # and we never hold the whole recording as one base64 string
+        for i in range(0, len(pcm), AUDIO_SEND_CHUNK_BYTES):
+            audio_b64 = b2a_base64(pcm[i:i + AUDIO_SEND_CHUNK_BYTES], newline=False).decode('ascii')
+            await self.ws.send(_APPEND_PREFIX + audio_b64 + _APPEND_SUFFIX)
         
         # Commit the buffer
-        commit_event = {
-            "type": "input_audio_buffer.commit"
-        }
-        await self.ws.send(json.dumps(commit_event))
+        await self.ws.send(_COMMIT_EVENT)
         
         # In manual mode, we need to explicitly request a response
         if self.turn_detection_mode == TurnDetectionMode.MANUAL:
@@ -206,26 +271,23 @@ class RealtimeClient:
 
     async def stream_audio(self, audio_chunk: bytes) -> None:
         """Stream raw audio data to the API."""
-        audio_b64 = base64.b64encode(audio_chunk).decode()
-        
-        append_event = {
-            "type": "input_audio_buffer.append",
-            "audio": audio_b64
-        }
-        await self.ws.send(json.dumps(append_event))
+        audio_b64 = b2a_base64(audio_chunk, newline=False).decode('ascii')
+        await self.ws.send(_APPEND_PREFIX + audio_b64 + _APPEND_SUFFIX)
 
     async def create_response(self, functions: Optional[List[Dict[str, Any]]] = None) -> None:
         """Request a response from the API. Needed when using manual mode."""
+        if not functions:
+            await self.ws.send(_RESPONSE_CREATE_EVENT)
+            return
+
         event = {
             "type": "response.create",
             "response": {
-                "modalities": ["text", "audio"]
+                "modalities": ["text", "audio"],
+                "tools": functions
             }
         }
-        if functions:
-            event["response"]["tools"] = functions
-            
-        await self.ws.send(json.dumps(event))
+        await self._send_event(event)
 
     async def send_function_result(self, call_id: str, result: Any) -> None:
         """Send function call result back to the API."""
@@ -237,17 +299,14 @@ class RealtimeClient:
                 "output": result
             }
         }
-        await self.ws.send(json.dumps(event))
+        await self._send_event(event)
 
         # functions need a manual response
         await self.create_response()
 
     async def cancel_response(self) -> None:
         """Cancel the current response."""
-        event = {
-            "type": "response.cancel"
-        }
-        await self.ws.send(json.dumps(event))
+        await self.ws.send(_RESPONSE_CANCEL_EVENT)
     
     async def truncate_response(self):
         """Truncate the conversation item to match what was actually played."""
@@ -256,7 +315,7 @@ class RealtimeClient:
                 "type": "conversation.item.truncate",
                 "item_id": self._current_item_id
             }
-            await self.ws.send(json.dumps(event))
+            await self._send_event(event)
 
     async def call_tool(self, call_id: str,tool_name: str, tool_arguments: Dict[str, Any]) -> None:
         tool_selection = ToolSelection(
@@ -294,10 +353,25 @@ class RealtimeClient:
         self._current_response_id = None
         self._current_item_id = None
 
+    async def _audio_worker(self) -> None:
+        """Decode queued audio deltas and pass them to on_audio_delta, off the WebSocket read loop."""
+        while True:
+            audio_b64 = await self._audio_decode_queue.get()
+            try:
+                self.on_audio_delta(a2b_base64(audio_b64))
+            except Exception as e:
+                print(f"Error handling audio delta: {str(e)}")
+
+    def _clear_audio_queue(self) -> None:
+        """Drop any audio deltas that have not been played yet."""
+        while not self._audio_decode_queue.empty():
+            self._audio_decode_queue.get_nowait()
+
     async def handle_messages(self) -> None:
+        audio_worker = asyncio.create_task(self._audio_worker())
         try:
             async for message in self.ws:
-                event = json.loads(message)
+                event = orjson.loads(message)
                 event_type = event.get("type")
                 
                 if event_type == "error":
@@ -323,6 +397,7 @@ class RealtimeClient:
                     if self._is_responding:
                         await self.handle_interruption()
 
+                    self._clear_audio_queue()
                     if self.on_interrupt:
                         self.on_interrupt()
 
@@ -337,11 +412,11 @@ class RealtimeClient:
                         
                 elif event_type == "response.audio.delta":
                     if self.on_audio_delta:
-                        audio_bytes = base64.b64decode(event["delta"])
-                        self.on_audio_delta(audio_bytes)
+                        # Decoding and playback happen in _audio_worker so the read loop isn't held up
+                        self._audio_decode_queue.put_nowait(event["delta"])
                         
                 elif event_type == "response.function_call_arguments.done":
-                    await self.call_tool(event["call_id"], event['name'], json.loads(event['arguments']))
+                    await self.call_tool(event["call_id"], event['name'], orjson.loads(event['arguments']))
 
                 # Handle input audio transcription
                 elif event_type == "conversation.item.input_audio_transcription.completed":
@@ -374,6 +449,8 @@ class RealtimeClient:
             print("Connection closed")
         except Exception as e:
             print(f"Error in message handling: {str(e)}")
+        finally:
+            audio_worker.cancel()
 
     async def close(self) -> None:
         """Close the WebSocket connection."""
@@ -1,11 +1,7 @@
 import asyncio
 import pyaudio
-import wave
-import queue
-import io
+import struct
 from typing import Optional
-
-from pydub import AudioSegment
 import threading
 
 from ..client.realtime_client import RealtimeClient
@@ -15,38 +11,42 @@ class AudioHandler:
     """
     Handles audio input and output for the chatbot.
 
-    Uses PyAudio for audio input and output, and runs a separate thread for recording and playing audio.
+    Uses PyAudio for audio input and output. Recording and playback both use PyAudio's callback mode,
+    so audio is moved on PortAudio's own thread rather than on Python threads.
 
-    When playing audio, it uses a buffer to store audio data and plays it continuously to ensure smooth playback.
+    When playing audio, it writes audio data into a ring buffer that the output callback drains continuously to ensure smooth playback.
 
     Attributes:
         format (int): The audio format (paInt16).
         channels (int): The number of audio channels (1).
         rate (int): The sample rate (24000).
-        chunk (int): The size of the audio buffer (1024).
+        chunk (int): The size of the audio buffer in frames (480, i.e. 20ms).
         audio (pyaudio.PyAudio): The PyAudio object.
         recording_stream (pyaudio.Stream): The stream for recording audio.
-        recording_thread (threading.Thread): The thread for recording audio.
+        frames (bytearray): The buffer that recorded audio is written into.
+        frames_len (int): The number of bytes of recorded audio in frames.
         recording (bool): Whether the audio is currently being recorded.
         streaming (bool): Whether the audio is currently being streamed.
         stream (pyaudio.Stream): The stream for streaming audio.
         playback_stream (pyaudio.Stream): The stream for playing audio.
-        playback_buffer (queue.Queue): The buffer for playing audio.
-        stop_playback (bool): Whether the audio playback should be stopped.
     """
-    def __init__(self):
+    def __init__(self, chunk_ms: int = 20):
         # Audio parameters
         self.format = pyaudio.paInt16
         self.channels = 1
         self.rate = 24000
-        self.chunk = 1024
+        # Smaller buffers lower the latency between the mic/speaker and our callbacks,
+        # at the cost of running the callbacks more often. 20ms matches the server VAD frame size.
+        self.chunk = self.rate * chunk_ms // 1000
 
         self.audio = pyaudio.PyAudio()
 
         # Recording params
         self.recording_stream: Optional[pyaudio.Stream] = None
-        self.recording_thread = None
         self.recording = False
+        # Pre-size for ~60 seconds of audio, _on_input grows it if needed
+        self.frames = bytearray(self.rate * self.channels * 2 * 60)
+        self.frames_len = 0
 
         # streaming params
         self.streaming = False
@@ -54,10 +54,18 @@ class AudioHandler:
 
         # Playback params
         self.playback_stream = None
-        self.playback_buffer = queue.Queue(maxsize=20)
-        self.playback_event = threading.Event()
-        self.playback_thread = None
-        self.stop_playback = False
+        # Ring buffer for audio waiting to be played. play_audio writes at _play_w,
+        # _on_output reads at _play_r, and _play_len is the number of unplayed bytes.
+        # The server sends audio faster than real time, so this is pre-sized for ~30 seconds
+        # and play_audio grows it rather than dropping audio. The lock is only held while
+        # copying and updating the cursors.
+        self._play_ring = bytearray(self.rate * self.channels * 2 * 30)
+        # Slicing the view instead of the bytearray avoids a temporary copy per slice
+        self._play_view = memoryview(self._play_ring)
+        self._play_r = 0
+        self._play_w = 0
+        self._play_len = 0
+        self._play_lock = threading.Lock()
 
     def start_recording(self) -> bytes:
         """Start recording audio from microphone and return bytes"""
@@ -65,30 +73,34 @@ class AudioHandler:
             return b''
         
         self.recording = True
-        self.recording_stream = self.audio.open(
-            format=self.format,
-            channels=self.channels,
-            rate=self.rate,
-            input=True,
-            frames_per_buffer=self.chunk
-        )
+        self.frames_len = 0
+        # The stream is opened once and then only started/stopped per recording,
+        # which is much cheaper than renegotiating with the driver every time
+        if self.recording_stream is None:
+            self.recording_stream = self.audio.open(
+                format=self.format,
+                channels=self.channels,
+                rate=self.rate,
+                input=True,
+                frames_per_buffer=self.chunk,
+                stream_callback=self._on_input,
+                start=False
+            )
+        self.recording_stream.start_stream()
         
         print("\nRecording... Press 'space' to stop.")
         
-        self.frames = []
-        self.recording_thread = threading.Thread(target=self._record)
-        self.recording_thread.start()
-        
         return b''  # Return empty bytes, we'll send audio later
 
-    def _record(self):
-        while self.recording:
-            try:
-                data = self.recording_stream.read(self.chunk)
-                self.frames.append(data)
-            except Exception as e:
-                print(f"Error recording: {e}")
-                break
+    def _on_input(self, in_data, frame_count, time_info, status):
+        """PyAudio input callback, runs on PortAudio's audio thread"""
+        end = self.frames_len + len(in_data)
+        if end > len(self.frames):
+            # Double the capacity rather than growing per chunk
+            self.frames.extend(bytes(max(len(self.frames), len(in_data))))
+        self.frames[self.frames_len:end] = in_data
+        self.frames_len = end
+        return (None, pyaudio.paContinue)
 
     def stop_recording(self) -> bytes:
         """Stop recording and return the recorded audio as bytes"""
@@ -96,26 +108,26 @@ class AudioHandler:
             return b''
         
         self.recording = False
-        if self.recording_thread:
-            self.recording_thread.join()
         
-        # Clean up recording stream
+        # Pause the recording stream, stop_stream waits for any pending callback.
+        # The stream itself stays open for the next recording until cleanup.
         if self.recording_stream:
             self.recording_stream.stop_stream()
-            self.recording_stream.close()
-            self.recording_stream = None
         
-        # Convert frames to WAV format in memory
-        wav_buffer = io.BytesIO()
-        with wave.open(wav_buffer, 'wb') as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(self.audio.get_sample_size(self.format))
-            wf.setframerate(self.rate)
-            wf.writeframes(b''.join(self.frames))
-        
-        # Get the WAV data
-        wav_buffer.seek(0)
-        return wav_buffer.read()
+        # Prepend a 44-byte WAV header to the raw PCM, no intermediate copies
+        return self._wav_header(self.frames_len) + memoryview(self.frames)[:self.frames_len]
+
+    def _wav_header(self, data_size: int) -> bytes:
+        """Build a canonical 44-byte PCM WAV header for `data_size` bytes of audio"""
+        sample_width = self.audio.get_sample_size(self.format)
+        return struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, self.channels, self.rate,
+            self.rate * self.channels * sample_width,
+            self.channels * sample_width, sample_width * 8,
+            b'data', data_size
+        )
 
     async def start_streaming(self, client: RealtimeClient):
         """Start continuous audio streaming."""
@@ -153,87 +165,96 @@ class AudioHandler:
             self.stream = None
 
     def play_audio(self, audio_data: bytes):
-        """Add audio data to the buffer"""
-        try:
-            self.playback_buffer.put_nowait(audio_data)
-        except queue.Full:
-            # If the buffer is full, remove the oldest chunk and add the new one
-            self.playback_buffer.get_nowait()
-            self.playback_buffer.put_nowait(audio_data)
-        
-        if not self.playback_thread or not self.playback_thread.is_alive():
-            self.stop_playback = False
-            self.playback_event.clear()
-            self.playback_thread = threading.Thread(target=self._continuous_playback)
-            self.playback_thread.start()
-
-    def _continuous_playback(self):
-        """Continuously play audio from the buffer"""
-        self.playback_stream = self.audio.open(
-            format=self.format,
-            channels=self.channels,
-            rate=self.rate,
-            output=True,
-            frames_per_buffer=self.chunk
-        )
-
-        while not self.stop_playback:
-            try:
-                audio_chunk = self.playback_buffer.get(timeout=0.1)
-                self._play_audio_chunk(audio_chunk)
-            except queue.Empty:
-                continue
-            
-            if self.playback_event.is_set():
-                break
+        """Add audio data to the playback buffer"""
+        with self._play_lock:
+            data = memoryview(audio_data)
+            n = len(data)
+            if self._play_len + n > len(self._play_view):
+                self._grow_playback_ring(self._play_len + n)
 
-        if self.playback_stream:
-            self.playback_stream.stop_stream()
-            self.playback_stream.close()
-            self.playback_stream = None
+            ring = self._play_view
+            size = len(ring)
+            first = min(n, size - self._play_w)
+            ring[self._play_w:self._play_w + first] = data[:first]
+            ring[:n - first] = data[first:]
+            self._play_w = (self._play_w + n) % size
+            self._play_len += n
 
-    def _play_audio_chunk(self, audio_chunk):
-        try:
-            # Convert the audio chunk to the correct format
-            audio_segment = AudioSegment(
-                audio_chunk,
-                sample_width=2,
-                frame_rate=24000,
-                channels=1
+        if self.playback_stream is None:
+            self.playback_stream = self.audio.open(
+                format=self.format,
+                channels=self.channels,
+                rate=self.rate,
+                output=True,
+                frames_per_buffer=self.chunk,
+                stream_callback=self._on_output
             )
-            
-            # Ensure the audio is in the correct format for playback
-            audio_data = audio_segment.raw_data
-            
-            # Play the audio chunk in smaller portions to allow for quicker interruption
-            chunk_size = 1024  # Adjust this value as needed
-            for i in range(0, len(audio_data), chunk_size):
-                if self.playback_event.is_set():
-                    break
-                chunk = audio_data[i:i+chunk_size]
-                self.playback_stream.write(chunk)
-        except Exception as e:
-            print(f"Error playing audio chunk: {e}")
+
+    def _grow_playback_ring(self, min_size: int):
+        """Grow the playback ring to at least `min_size` bytes, keeping unplayed audio. Call with _play_lock held."""
+        old = self._play_view
+        size = len(old)
+        new_size = size
+        while new_size < min_size:
+            # Double the capacity rather than growing per chunk
+            new_size *= 2
+
+        # Copy the unplayed audio (which may wrap around) to the start of the new ring
+        ring = bytearray(new_size)
+        n = self._play_len
+        first = min(n, size - self._play_r)
+        ring[:first] = old[self._play_r:self._play_r + first]
+        ring[first:n] = old[:n - first]
+
+        self._play_ring = ring
+        self._play_view = memoryview(ring)
+        self._play_r = 0
+        self._play_w = n
+
+    def _on_output(self, in_data, frame_count, time_info, status):
+        """PyAudio output callback, runs on PortAudio's audio thread"""
+        nbytes = frame_count * self.channels * self.audio.get_sample_size(self.format)
+        with self._play_lock:
+            ring = self._play_view
+            size = len(ring)
+            r = self._play_r
+            n = min(nbytes, self._play_len)
+            self._play_r = (r + n) % size
+            self._play_len -= n
+
+            if n == nbytes and r + n <= size:
+                # Common case: a full, contiguous read needs just the one copy into bytes
+                return (bytes(ring[r:r + n]), pyaudio.paContinue)
+
+            # Zero-filled, so any part we can't fill from the ring plays as silence
+            out = bytearray(nbytes)
+            first = min(n, size - r)
+            out[:first] = ring[r:r + first]
+            out[first:n] = ring[:n - first]
+        return (bytes(out), pyaudio.paContinue)
 
     def stop_playback_immediately(self):
         """Stop audio playback immediately."""
-        self.stop_playback = True
-        self.playback_buffer.queue.clear()  # Clear any pending audio
-        self.currently_playing = False
-        self.playback_event.set()
+        with self._play_lock:
+            # Drop any pending audio, the output callback will play silence
+            self._play_r = 0
+            self._play_w = 0
+            self._play_len = 0
 
     def cleanup(self):
         """Clean up audio resources"""
         self.stop_playback_immediately()
 
-        self.stop_playback = True
-        if self.playback_thread:
-            self.playback_thread.join()
+        if self.playback_stream:
+            self.playback_stream.stop_stream()
+            self.playback_stream.close()
+            self.playback_stream = None
 
         self.recording = False
         if self.recording_stream:
             self.recording_stream.stop_stream()
             self.recording_stream.close()
+            self.recording_stream = None
         
         if self.stream:
             self.stream.stop_stream()
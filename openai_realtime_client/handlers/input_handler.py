@@ -1,4 +1,6 @@
 import asyncio
+from typing import List
+
 from pynput import keyboard
 
 
@@ -9,13 +11,15 @@ class InputHandler:
     This class is responsible for capturing keyboard input and translating it into commands for the chatbot.
 
     Attributes:
-        text_input (str): The current text input from the user.
+        text_chars (List[str]): The characters typed by the user since the last Enter.
         text_ready (asyncio.Event): An event that is set when the user has finished typing.
         command_queue (asyncio.Queue): A queue that stores commands for the chatbot.
         loop (asyncio.AbstractEventLoop): The event loop for the input handler.
     """
     def __init__(self):
-        self.text_input = ""
+        # Accumulate characters in a list and join them once on Enter,
+        # rather than reallocating a string on every keystroke
+        self.text_chars: List[str] = []
         self.text_ready = asyncio.Event()
         self.command_queue = asyncio.Queue()
         self.loop = None
@@ -27,10 +31,11 @@ class InputHandler:
                     self.command_queue.put_nowait, ('space', None)
                 )
             elif key == keyboard.Key.enter:
+                text = ''.join(self.text_chars)
+                self.text_chars.clear()
                 self.loop.call_soon_threadsafe(
-                    self.command_queue.put_nowait, ('enter', self.text_input)
+                    self.command_queue.put_nowait, ('enter', text)
                 )
-                self.text_input = ""
             elif key == keyboard.KeyCode.from_char('r'):
                 self.loop.call_soon_threadsafe(
                     self.command_queue.put_nowait, ('r', None)
@@ -39,10 +44,10 @@ class InputHandler:
                 self.loop.call_soon_threadsafe(
                     self.command_queue.put_nowait, ('q', None)
                 )
-            elif hasattr(key, 'char'):
-                if key == keyboard.Key.backspace:
-                    self.text_input = self.text_input[:-1]
-                else:
-                    self.text_input += key.char
+            elif key == keyboard.Key.backspace:
+                if self.text_chars:
+                    self.text_chars.pop()
+            elif hasattr(key, 'char') and key.char:
+                self.text_chars.append(key.char)
         except AttributeError:
             pass
\ No newline at end of file